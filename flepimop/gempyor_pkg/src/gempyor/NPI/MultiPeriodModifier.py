@@ -1,5 +1,4 @@
 import pandas as pd
-import numpy as np
 from . import helpers
 from .base import NPIBase
 
@@ -44,12 +43,6 @@ class MultiPeriodModifier(NPIBase):
         ):
             default_value = 0.0
 
-        self.npi = pd.DataFrame(
-            default_value,
-            index=self.subpops,
-            columns=pd.date_range(self.start_date, self.end_date),
-        )
-
         self.parameters = pd.DataFrame(
             data={
                 "modifier_name": [""] * len(self.subpops),
@@ -73,17 +66,28 @@ class MultiPeriodModifier(NPIBase):
             if too_early or too_late:
                 raise ValueError("at least one period start or end date is not between global dates")
 
+        # one entry per (subpop, period), in the order the periods are applied
+        period_subpops, period_starts, period_ends, values = [], [], [], []
         for grp_config in npi_config["groups"]:
             affected_subpops_grp = self.__get_affected_subpops_grp(grp_config)
-            for sub_index in range(len(self.parameters["start_date"][affected_subpops_grp[0]])):
-                period_range = pd.date_range(
-                    self.parameters["start_date"][affected_subpops_grp[0]][sub_index],
-                    self.parameters["end_date"][affected_subpops_grp[0]][sub_index],
-                )
-                self.npi.loc[affected_subpops_grp, period_range] = np.tile(
-                    self.parameters["value"][affected_subpops_grp],
-                    (len(period_range), 1),
-                ).T
+            grp_start_dates = self.parameters["start_date"][affected_subpops_grp[0]]
+            grp_end_dates = self.parameters["end_date"][affected_subpops_grp[0]]
+            grp_values = list(self.parameters["value"][affected_subpops_grp])
+            for start_date, end_date in zip(grp_start_dates, grp_end_dates):
+                period_subpops += affected_subpops_grp
+                period_starts += [start_date] * len(affected_subpops_grp)
+                period_ends += [end_date] * len(affected_subpops_grp)
+                values += grp_values
+        self.npi = helpers.build_reduction(
+            default_value,
+            self.subpops,
+            self.start_date,
+            self.end_date,
+            period_subpops=period_subpops,
+            period_starts=period_starts,
+            period_ends=period_ends,
+            values=values,
+        )
 
         # for index in self.parameters.index:
         #    for sub_index in range(len(self.parameters["start_date"][index])):
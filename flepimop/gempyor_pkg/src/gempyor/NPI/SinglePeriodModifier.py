@@ -43,11 +43,6 @@ class SinglePeriodModifier(NPIBase):
         ):
             default_value = 0.0
 
-        self.npi = pd.DataFrame(
-            default_value,
-            index=self.subpops,
-            columns=pd.date_range(self.start_date, self.end_date),
-        )
         self.parameters = pd.DataFrame(
             default_value,
             index=self.subpops,
@@ -68,10 +63,16 @@ class SinglePeriodModifier(NPIBase):
         ## This the line that does the work
         #    self.npi_old.loc[index, period_range] = np.tile(self.parameters["value"][index], (len(period_range), 1)).T
 
-        period_range = pd.date_range(self.parameters["start_date"].iloc[0], self.parameters["end_date"].iloc[0])
-        self.npi.loc[self.parameters.index, period_range] = np.tile(
-            self.parameters["value"][:], (len(period_range), 1)
-        ).T
+        self.npi = helpers.build_reduction(
+            default_value,
+            self.subpops,
+            self.start_date,
+            self.end_date,
+            period_subpops=self.parameters.index,
+            period_starts=self.parameters["start_date"],
+            period_ends=self.parameters["end_date"],
+            values=self.parameters["value"],
+        )
 
         # self.__checkErrors()
 
@@ -1,6 +1,7 @@
 import pandas as pd
 import numpy as np
 import typing
+from numba import jit
 
 
 # Helper function
@@ -86,3 +87,44 @@ def make_list_of_list(this_list):
         return this_list
     else:
         return [this_list]
+
+
+@jit(nopython=True, cache=True)
+def _accumulate_reductions(out, period_starts, period_ends, values, subpop_idx):
+    """Write values[i] into out[subpop_idx[i], period_starts[i]:period_ends[i] + 1], in order, so later periods
+    override earlier ones exactly as successive .loc assignments would."""
+    for i in range(values.shape[0]):
+        out[subpop_idx[i], period_starts[i] : period_ends[i] + 1] = values[i]
+    return out
+
+
+def build_reduction(
+    default_value: float,
+    subpops: list,
+    start_date,
+    end_date,
+    period_subpops: list,
+    period_starts: list,
+    period_ends: list,
+    values,
+) -> pd.DataFrame:
+    """
+    Build the (subpops x days) reduction dataframe of a modifier in one go.
+    Each entry i of the period_* lists and values sets subpop period_subpops[i] to values[i] from
+    period_starts[i] to period_ends[i] (both inclusive), the rest of the array being default_value.
+    """
+    dates = pd.date_range(start_date, end_date)
+    reduction = np.full((len(subpops), len(dates)), default_value, dtype=np.float64)
+    if len(period_subpops):
+        subpop_idx = pd.Index(subpops).get_indexer(period_subpops)
+        if (subpop_idx < 0).any():
+            raise ValueError(f"Invalid config value {set(np.asarray(period_subpops)[subpop_idx < 0])} not in subpops")
+        first_day = pd.Timestamp(start_date)
+        starts = (pd.to_datetime(list(period_starts)) - first_day).days.to_numpy(dtype=np.int64)
+        ends = (pd.to_datetime(list(period_ends)) - first_day).days.to_numpy(dtype=np.int64)
+        active = starts <= ends
+        if (starts[active] < 0).any() or (ends[active] >= len(dates)).any():
+            raise ValueError("at least one period start or end date is not between global dates")
+        values = np.array([np.squeeze(v) for v in values], dtype=np.float64)
+        _accumulate_reductions(reduction, starts, ends, values, subpop_idx.astype(np.int64))
+    return pd.DataFrame(reduction, index=subpops, columns=dates)
@@ -5,7 +5,7 @@ from gempyor.inference import GempyorInference
 from gempyor.utils import config, as_list
 import gempyor
 import numpy as np
-import os, shutil, copy
+import os, shutil
 import emcee
 import multiprocessing
 import gempyor.postprocess_inference
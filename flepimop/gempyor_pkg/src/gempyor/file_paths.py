@@ -17,7 +17,7 @@ from pathlib import Path
 
 def create_file_name(
     run_id: str,
-    prefix: str,
+    prefix: str | os.PathLike,
     index: str | int,
     ftype: str,
     extension: str,
@@ -77,12 +77,12 @@ def create_file_name(
         inference_filename_prefix,
         create_directory=create_directory,
     )
-    return f"{fn_no_ext}.%s" % (extension,)
+    return f"{fn_no_ext}.{extension}"
 
 
 def create_file_name_without_extension(
     run_id: str,
-    prefix: str,
+    prefix: str | os.PathLike,
     index: str | int,
     ftype: str,
     inference_filepath_suffix: str,
@@ -170,7 +170,7 @@ def run_id(timestamp: None | datetime = None) -> str:
 
 def create_dir_name(
     run_id: str,
-    prefix: str,
+    prefix: str | os.PathLike,
     ftype: str,
     inference_filepath_suffix: str,
     inference_filename_prefix: str,
@@ -1,11 +1,130 @@
+import numpy as np
 import pandas as pd
-import datetime, os, logging, pathlib, confuse
-from . import seeding, subpopulation_structure, parameters, compartments, file_paths, initial_conditions
+import pyarrow as pa
+import pyarrow.parquet as pq
+import scipy.sparse
+import ast, datetime, functools, hashlib, operator, os, logging, pathlib, weakref, confuse
+from . import subpopulation_structure, file_paths
 from .utils import read_df, write_df
 
 logger = logging.getLogger(__name__)
 
 
+# Accepted values of seir::integration::method and the integrator they run
+_INTEGRATION_METHOD_ALIASES = {
+    "best.current": "rk4.jit",
+    "rk4": "rk4.jit",
+    "rk4.jit": "rk4.jit",
+    "legacy": "legacy",
+}
+
+
+# Operators allowed in arithmetic config expressions such as `dt: 1/6`
+_ARITHMETIC_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Pow: operator.pow,
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+
+
+def _evaluate_arithmetic(node: ast.AST) -> float:
+    if isinstance(node, ast.Expression):
+        return _evaluate_arithmetic(node.body)
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return node.value
+    if isinstance(node, ast.BinOp) and type(node.op) in _ARITHMETIC_OPERATORS:
+        return _ARITHMETIC_OPERATORS[type(node.op)](_evaluate_arithmetic(node.left), _evaluate_arithmetic(node.right))
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _ARITHMETIC_OPERATORS:
+        return _ARITHMETIC_OPERATORS[type(node.op)](_evaluate_arithmetic(node.operand))
+    raise ValueError(f"Unsupported element '{ast.dump(node)}' in arithmetic expression.")
+
+
+def _parse_dt(dt: str) -> float:
+    try:
+        return float(_evaluate_arithmetic(ast.parse(dt.strip(), mode="eval")))
+    except (SyntaxError, ValueError, ArithmeticError) as e:
+        raise ValueError(f"Could not parse the integration dt '{dt}' as an arithmetic expression.") from e
+
+
+@functools.lru_cache(maxsize=None)
+def _parse_integration_settings(method, dt):
+    resolved_method = _INTEGRATION_METHOD_ALIASES.get("best.current" if method is None else method)
+    if resolved_method is None:
+        raise ValueError(f"Unknown integration method {method}.")
+    if dt is not None:
+        dt = _parse_dt(dt)
+    else:
+        dt = 2.0
+    return resolved_method, dt
+
+
+def get_integration_settings(seir_config: confuse.ConfigView) -> tuple[str, float]:
+    """
+    Resolve the integration method and time step of a `seir` config section.
+
+    The config is looked up at every call, since it may be modified after a `ModelInfo`
+    was built, but the parsing of the raw values is cached.
+
+    Returns:
+        A tuple of the integration method and dt.
+    """
+    if "integration" not in seir_config.keys():
+        logging.info("Integration method not provided, assuming type rk4.jit with dt=2")
+        return "rk4.jit", 2.0
+    integration_config = seir_config["integration"]
+    method = integration_config["method"].get() if "method" in integration_config.keys() else None
+    dt = str(integration_config["dt"].get()) if "dt" in integration_config.keys() else None
+    return _parse_integration_settings(method, dt)
+
+
+# Output file types written by the seir and outcomes steps
+_SEIR_FTYPES = ("seir", "spar", "snpi")
+_OUTCOMES_FTYPES = ("hosp", "hpar", "hnpi")
+
+# Time at which this process loaded gempyor, shared by all the ModelInfo it builds
+_PROCESS_TIMESTAMP = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+
+# Output directories already created by ModelInfo in this process, keyed by working
+# directory and naming arguments. write_simID still creates missing directories itself.
+_CREATED_OUTPUT_DIRS = set()
+
+
+@functools.lru_cache(maxsize=4096)
+def _cached_create_file_name(
+    run_id, prefix, index, ftype, extension, inference_filepath_suffix, inference_filename_prefix
+) -> str:
+    # Pure name construction: directories are created by the writers (see write_simID)
+    return file_paths.create_file_name(
+        run_id=run_id,
+        prefix=prefix,
+        index=index,
+        ftype=ftype,
+        extension=extension,
+        inference_filepath_suffix=inference_filepath_suffix,
+        inference_filename_prefix=inference_filename_prefix,
+        create_directory=False,
+    )
+
+
+# Compartments built from identical configs (e.g. by successive GempyorInference on the
+# same file) are shared for as long as a ModelInfo holds them. Parameters are not: they
+# also depend on the timeseries files they read, which the config does not capture.
+_SHARED_INSTANCES = weakref.WeakValueDictionary()
+
+
+def _shared_instance(key_parts: tuple, build):
+    key = hashlib.blake2b(repr(key_parts).encode(), digest_size=16).digest()
+    instance = _SHARED_INSTANCES.get(key)
+    if instance is None:
+        instance = build()
+        _SHARED_INSTANCES[key] = instance
+    return instance
+
+
 class TimeSetup:
     def __init__(self, config: confuse.ConfigView):
         self.ti = config["start_date"].as_date()
@@ -34,6 +153,56 @@ class ModelInfo:
     ```
     """
 
+    __slots__ = (
+        # run settings
+        "nslots",
+        "write_csv",
+        "write_parquet",
+        "first_sim_index",
+        "stoch_traj_flag",
+        "seir_modifiers_scenario",
+        "outcome_modifiers_scenario",
+        "setup_name",
+        # time
+        "time_setup",
+        "ti",
+        "tf",
+        "n_days",
+        "dates",
+        # subpopulations
+        "path_prefix",
+        "subpop_struct",
+        "nsubpops",
+        "subpop_pop",
+        "mobility",
+        # seir
+        "seir_config",
+        "parameters_config",
+        "initial_conditions_config",
+        "seeding_config",
+        "parameters",
+        "seeding",
+        "initial_conditions",
+        "compartments",
+        "npi_config_seir",
+        "seir_modifiers_library",
+        # outcomes
+        "outcomes_config",
+        "npi_config_outcomes",
+        "outcome_modifiers_library",
+        # inputs and outputs
+        "in_run_id",
+        "out_run_id",
+        "in_prefix",
+        "out_prefix",
+        "inference_filename_prefix",
+        "inference_filepath_suffix",
+        "timestamp",
+        "extension",
+        "config_filepath",
+        "_parquet_schemas",
+    )
+
     def __init__(
         self,
         *,
@@ -105,10 +274,16 @@ class ModelInfo:
         self.nsubpops = self.subpop_struct.nsubpops
         self.subpop_pop = self.subpop_struct.subpop_pop
         self.mobility = self.subpop_struct.mobility
+        # The integrators walk mobility through its CSR arrays, whatever format it was loaded in
+        if not isinstance(self.mobility, scipy.sparse.csr_matrix):
+            self.mobility = scipy.sparse.csr_matrix(self.mobility)
 
         # 4. the SEIR structure
         self.seir_config = None
         if config["seir"].exists():
+            # Only needed when running seir, so keep them out of the module import.
+            from . import seeding, parameters, compartments, initial_conditions
+
             self.seir_config = config["seir"]
             self.parameters_config = config["seir"]["parameters"]
             self.initial_conditions_config = (
@@ -136,10 +311,26 @@ class ModelInfo:
             )
             # really ugly references to the config globally here.
             if config["compartments"].exists() and self.seir_config is not None:
-                self.compartments = compartments.Compartments(
-                    seir_config=self.seir_config, compartments_config=config["compartments"]
+                self.compartments = _shared_instance(
+                    ("compartments", self.seir_config.flatten(), config["compartments"].flatten()),
+                    lambda: compartments.Compartments(
+                        seir_config=self.seir_config, compartments_config=config["compartments"]
+                    ),
                 )
 
+            # Compile the steps_rk4 kernels of the selected integration method now rather than
+            # during the first simulation (FLEPI_NUMBA_WARMUP=0 to skip). An invalid integration
+            # section is left to raise when the simulation resolves it, as it did before.
+            if os.environ.get("FLEPI_NUMBA_WARMUP", "1") == "1":
+                try:
+                    integration_method = get_integration_settings(self.seir_config)[0]
+                except ValueError:
+                    integration_method = None
+                if integration_method in ("rk4.jit", "legacy"):
+                    from . import steps_rk4
+
+                    steps_rk4.warm_up_jit("rk4" if integration_method == "rk4.jit" else "legacy")
+
             # SEIR modifiers
             self.npi_config_seir = None
             if config["seir_modifiers"].exists():
@@ -165,22 +356,18 @@ class ModelInfo:
         self.outcomes_config = config["outcomes"] if config["outcomes"].exists() else None
         if self.outcomes_config is not None:
             self.npi_config_outcomes = None
-            if config["outcome_modifiers"].exists():
-                if config["outcome_modifiers"]["scenarios"].exists():
-                    self.npi_config_outcomes = config["outcome_modifiers"]["modifiers"][self.outcome_modifiers_scenario]
-                    self.outcome_modifiers_library = config["outcome_modifiers"]["modifiers"].get()
+            outcome_modifiers_config = config["outcome_modifiers"]
+            if outcome_modifiers_config.exists():
+                self.outcome_modifiers_library = outcome_modifiers_config["modifiers"].get()
+                if outcome_modifiers_config["scenarios"].exists():
+                    self.npi_config_outcomes = outcome_modifiers_config["modifiers"][self.outcome_modifiers_scenario]
                 else:
-                    self.outcome_modifiers_library = config["outcome_modifiers"]["modifiers"].get()
                     raise ValueError("Not implemented yet")  # TODO create a Stacked from all
 
             ## NEED TO IMPLEMENT THIS -- CURRENTLY CANNOT USE outcome modifiers
             elif self.outcome_modifiers_scenario is not None:
-                if config["outcome_modifiers"].exists():
-                    raise ValueError(
-                        "An outcome modifiers scenario was provided to ModelInfo but no 'outcome_modifiers' sections in config"
-                    )
-                else:
-                    self.outcome_modifiers_scenario = None
+                # without an 'outcome_modifiers' section there is nothing to apply the scenario to
+                self.outcome_modifiers_scenario = None
             else:
                 logging.info("Running ModelInfo with outcomes but without Outcomes Modifiers")
         elif self.outcome_modifiers_scenario is not None:
@@ -211,13 +398,24 @@ class ModelInfo:
         self.inference_filepath_suffix = inference_filepath_suffix
 
         if self.write_csv or self.write_parquet:
-            self.timestamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
-            ftypes = []
-            if config["seir"].exists():
-                ftypes.extend(["seir", "spar", "snpi"])
-            if config["outcomes"].exists():
-                ftypes.extend(["hosp", "hpar", "hnpi"])
+            self.timestamp = _PROCESS_TIMESTAMP
+            ftypes = ()
+            if self.seir_config is not None:
+                ftypes += _SEIR_FTYPES
+            if self.outcomes_config is not None:
+                ftypes += _OUTCOMES_FTYPES
+            cwd = os.getcwd()
             for ftype in ftypes:
+                dir_key = (
+                    cwd,
+                    self.out_run_id,
+                    self.out_prefix,
+                    ftype,
+                    inference_filepath_suffix,
+                    inference_filename_prefix,
+                )
+                if dir_key in _CREATED_OUTPUT_DIRS:
+                    continue
                 datadir = file_paths.create_dir_name(
                     run_id=self.out_run_id,
                     prefix=self.out_prefix,
@@ -226,6 +424,7 @@ class ModelInfo:
                     inference_filepath_suffix=inference_filepath_suffix,
                 )
                 os.makedirs(datadir, exist_ok=True)
+                _CREATED_OUTPUT_DIRS.add(dir_key)
 
             if self.write_parquet and self.write_csv:
                 print("Confused between reading .csv or parquet. Assuming input file is .parquet")
@@ -236,6 +435,24 @@ class ModelInfo:
 
         self.config_filepath = config_filepath  # useful for plugins
 
+        # arrow schemas of the parquet outputs, see _write_parquet
+        self._parquet_schemas = {}
+
+    @property
+    def mobility_data(self) -> np.ndarray:
+        """Non-zero mobility fluxes as float64, as consumed by the compiled integrators."""
+        return self.mobility.data.astype("float64")
+
+    @property
+    def mobility_indices(self) -> np.ndarray:
+        """Destination subpop of each entry of `mobility_data` (the CSR column indices)."""
+        return self.mobility.indices
+
+    @property
+    def mobility_indptr(self) -> np.ndarray:
+        """Start of each origin subpop's fluxes in `mobility_data` (the CSR row pointers)."""
+        return self.mobility.indptr
+
     def get_input_filename(self, ftype: str, sim_id: int, extension_override: str = ""):
         return self.path_prefix / self.get_filename(
             ftype=ftype,
@@ -267,17 +484,24 @@ class ModelInfo:
             run_id = self.out_run_id
             prefix = self.out_prefix
 
-        fn = self.path_prefix / file_paths.create_file_name(
-            run_id=run_id,
-            prefix=prefix,
-            index=sim_id + self.first_sim_index - 1,
-            inference_filepath_suffix=self.inference_filepath_suffix,
-            inference_filename_prefix=self.inference_filename_prefix,
-            ftype=ftype,
-            extension=extension,
+        fn = self.path_prefix / _cached_create_file_name(
+            run_id,
+            prefix,
+            sim_id + self.first_sim_index - 1,
+            ftype,
+            extension,
+            self.inference_filepath_suffix,
+            self.inference_filename_prefix,
         )
         return fn
 
+    def get_filenames(self, ftype: str, sim_ids, input: bool = False, extension_override: str = ""):
+        """return the CSP formated filenames of several sim_ids at once, see `get_filename`."""
+        return [
+            self.get_filename(ftype=ftype, sim_id=sim_id, input=input, extension_override=extension_override)
+            for sim_id in sim_ids
+        ]
+
     def get_setup_name(self):
         return self.setup_name
 
@@ -309,8 +533,28 @@ class ModelInfo:
         os.makedirs(os.path.dirname(fname), exist_ok=True)
 
         # print(f"Writing {fname}")
-        write_df(
-            fname=fname,
-            df=df,
-        )
+        if fname.suffix == ".parquet":
+            self._write_parquet(ftype=ftype, fname=fname, df=df)
+        else:
+            write_df(
+                fname=fname,
+                df=df,
+            )
         return fname
+
+    def _write_parquet(self, ftype: str, fname: pathlib.Path, df: pd.DataFrame):
+        # Outputs of a ftype have the same columns for every sim_id, so the arrow schema is
+        # inferred once and reused for as long as the pandas columns and dtypes match.
+        schema_key = (ftype, tuple(df.columns), tuple(df.dtypes))
+        schema = self._parquet_schemas.get(schema_key)
+        table = None
+        if schema is not None:
+            try:
+                table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):  # e.g. an object column changed type
+                table = None
+        if table is None:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            self._parquet_schemas[schema_key] = table.schema
+        # default codec, as write_df uses, so every parquet output of a run reads the same way
+        pq.write_table(table, fname)
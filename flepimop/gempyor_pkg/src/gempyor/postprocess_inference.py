@@ -4,7 +4,6 @@ import pandas as pd
 import matplotlib.pyplot as plt
 
 from pathlib import Path
-import copy
 
 # import seaborn as sns
 import matplotlib._color_data as mcd
@@ -23,33 +23,14 @@ def build_step_source_arg(
     seeding_data,
     seeding_amounts,
 ):
-    if "integration" in modinf.seir_config.keys():
-        if "method" in modinf.seir_config["integration"].keys():
-            integration_method = modinf.seir_config["integration"]["method"].get()
-            if integration_method == "best.current":
-                integration_method = "rk4.jit"
-            if integration_method == "rk4":
-                integration_method = "rk4.jit"
-            if integration_method not in ["rk4.jit", "legacy"]:
-                raise ValueError(f"Unknown integration method {integration_method}.")
-        if "dt" in modinf.seir_config["integration"].keys():
-            dt = float(
-                eval(str(modinf.seir_config["integration"]["dt"].get()))
-            )  # ugly way to parse string and formulas
-        else:
-            dt = 2.0
-    else:
-        integration_method = "rk4.jit"
-        dt = 2.0
-        logging.info(f"Integration method not provided, assuming type {integration_method} with dt=2")
+    integration_method, dt = model_info.get_integration_settings(modinf.seir_config)
 
     ## The type is very important for the call to the compiled function, and e.g mixing an int64 for an int32 can
     ## result in serious error. Note that "In Microsoft C, even on a 64 bit system, the size of the long int data type
     ## is 32 bits." so upstream user need to specifcally cast everything to int64
     ## Somehow only mobility data is caseted by this function, but perhaps we should handle it all here ?
     assert type(modinf.mobility) == scipy.sparse.csr_matrix
-    mobility_data = modinf.mobility.data
-    mobility_data = mobility_data.astype("float64")
+    mobility_data = modinf.mobility_data
     assert type(modinf.compartments.compartments.shape[0]) == int
     assert type(modinf.nsubpops) == int
     assert modinf.n_days > 1
@@ -80,10 +61,10 @@ def build_step_source_arg(
 
     if len(mobility_data) > 0:
         assert type(mobility_data[0]) == np.float64
-        assert len(mobility_data) == len(modinf.mobility.indices)
-        assert type(modinf.mobility.indices[0]) == np.int32
-        assert len(modinf.mobility.indptr) == modinf.nsubpops + 1
-        assert type(modinf.mobility.indptr[0]) == np.int32
+        assert len(mobility_data) == len(modinf.mobility_indices)
+        assert type(modinf.mobility_indices[0]) == np.int32
+        assert len(modinf.mobility_indptr) == modinf.nsubpops + 1
+        assert type(modinf.mobility_indptr[0]) == np.int32
 
     assert len(modinf.subpop_pop) == modinf.nsubpops
     assert type(modinf.subpop_pop[0]) == np.int64
@@ -104,8 +85,8 @@ def build_step_source_arg(
         "seeding_data": seeding_data,
         "seeding_amounts": seeding_amounts,
         "mobility_data": mobility_data,
-        "mobility_row_indices": modinf.mobility.indices,
-        "mobility_data_indices": modinf.mobility.indptr,
+        "mobility_row_indices": modinf.mobility_indices,
+        "mobility_data_indices": modinf.mobility_indptr,
         "population": modinf.subpop_pop,
         "stochastic_p": modinf.stoch_traj_flag,
     }
@@ -19,6 +19,259 @@ proportion_exponent_col = 2
 float_tolerance = 1e-9
 
 
+@jit(nopython=True, cache=True)
+def rhs(
+    t,
+    x,
+    today,
+    ncompartments,
+    nspatial_nodes,
+    parameters,
+    dt,
+    transitions,
+    proportion_info,
+    transition_sum_compartments,
+    mobility_data,
+    mobility_row_indices,
+    mobility_data_indices,
+    population,
+    proportion_who_move,
+    percent_day_away,
+    stochastic_p,
+    method,
+):
+    ntransitions = transitions.shape[1]
+
+    states_current = np.reshape(x, (2, ncompartments, nspatial_nodes))[0]
+    st_next = states_current.copy()  # this is used to make sure stochastic integration never goes below zero
+    transition_amounts = np.zeros((ntransitions, nspatial_nodes))  # keep track of the transitions
+
+    if (x < 0).any():
+        print("Integration error: rhs got a negative x (pos, time)", np.where(x < 0), t)
+
+    for transition_index in range(ntransitions):
+        total_rate = np.ones((nspatial_nodes))
+        first_proportion = True
+
+        # Each transition may have several proportional_to factors
+        for proportion_index in range(
+            transitions[transition_proportion_start_col][transition_index],
+            transitions[transition_proportion_stop_col][transition_index],
+        ):
+            # Compute the number of individuals in the compartments for this proportions
+            relevant_number_in_comp = np.zeros((nspatial_nodes))
+            relevant_exponent = np.ones((nspatial_nodes))
+            for proportion_sum_index in range(
+                proportion_info[proportion_sum_starts_col][proportion_index],
+                proportion_info[proportion_sum_stops_col][proportion_index],
+            ):
+                relevant_number_in_comp += states_current[transition_sum_compartments[proportion_sum_index]]
+
+            # exponents should not be a proportion, since we don't sum them over sum compartments
+            relevant_exponent = parameters[proportion_info[proportion_exponent_col][proportion_index]][today]
+
+            # chadi: i believe what this mean that the first proportion is always the
+            # source compartment. That's why there is nothing with n_spatial node here.
+            # but (TODO) we should enforce that ?
+            if first_proportion:
+                only_one_proportion = (
+                    transitions[transition_proportion_start_col][transition_index] + 1
+                ) == transitions[transition_proportion_stop_col][transition_index]
+                first_proportion = False
+                source_number = relevant_number_in_comp  # does this mean we need the first to be "source" ??? yes !
+                if source_number.max() > 0:
+                    total_rate[source_number > 0] *= (
+                        source_number[source_number > 0] ** relevant_exponent[source_number > 0]
+                        / source_number[source_number > 0]
+                    )
+                if only_one_proportion:
+                    total_rate *= parameters[transitions[transition_rate_col][transition_index]][today]
+            else:
+                for spatial_node in range(nspatial_nodes):
+                    proportion_keep_compartment = 1 - percent_day_away * proportion_who_move[spatial_node]
+                    proportion_change_compartment = (
+                        percent_day_away
+                        * mobility_data[
+                            mobility_data_indices[spatial_node] : mobility_data_indices[spatial_node + 1]
+                        ]
+                        / population[spatial_node]
+                    )
+                    rate_keep_compartment = (
+                        proportion_keep_compartment
+                        * relevant_number_in_comp[spatial_node] ** relevant_exponent[spatial_node]
+                        / population[spatial_node]
+                        * parameters[transitions[transition_rate_col][transition_index]][today][spatial_node]
+                    )
+
+                    visiting_subpop = mobility_row_indices[
+                        mobility_data_indices[spatial_node] : mobility_data_indices[spatial_node + 1]
+                    ]
+
+                    rate_change_compartment = proportion_change_compartment * (
+                        relevant_number_in_comp[visiting_subpop] ** relevant_exponent[visiting_subpop]
+                    )
+                    rate_change_compartment /= population[visiting_subpop]
+                    rate_change_compartment *= parameters[transitions[transition_rate_col][transition_index]][
+                        today
+                    ][visiting_subpop]
+                    total_rate[spatial_node] *= (rate_keep_compartment + rate_change_compartment.sum())
+
+        # compute the number of individual transitioning from source to destination from the total rate
+        # number_move has shape (nspatial_nodes)
+        if method == "rk4":
+            number_move = source_number * total_rate
+        elif method == "legacy":
+            compound_adjusted_rate = 1.0 - np.exp(-dt * total_rate)
+            if stochastic_p:
+                number_move = source_number * compound_adjusted_rate  ## to initialize typ
+                for spatial_node in range(nspatial_nodes):
+                    number_move[spatial_node] = np.random.binomial(
+                        # number_move[spatial_node] = random.binomial(
+                        int(source_number[spatial_node]),
+                        compound_adjusted_rate[spatial_node],
+                    )
+            else:
+                number_move = source_number * compound_adjusted_rate
+
+        transition_amounts[transition_index] = number_move
+
+    # for spatial_node in range(nspatial_nodes):
+    #    if number_move[spatial_node] > states_current[transitions[transition_source_col][transition_index]][spatial_node]:
+    #        number_move[spatial_node] = states_current[transitions[transition_source_col][transition_index]][spatial_node]
+    return transition_amounts
+
+
+@jit(nopython=True, cache=True)
+def update_states(
+    states,
+    delta_t,
+    transition_amounts,
+    ncompartments,
+    nspatial_nodes,
+    transitions,
+    method,
+):
+    ntransitions = transitions.shape[1]
+    states_diff = np.zeros((2, ncompartments, nspatial_nodes))  # first dim: 0 -> states_diff, 1: states_cum
+    st_next = states.copy()
+    st_next = np.reshape(st_next, (2, ncompartments, nspatial_nodes))
+    if method == "rk4":
+        # we move by delta_t * transitions, in case of rk4
+        # when we use legacy, the compound_adjusted_rate  already
+        # includes the time step
+        transition_amounts = transition_amounts.copy() * delta_t
+
+    for transition_index in range(ntransitions):
+        for spatial_node in range(nspatial_nodes):
+            if transition_amounts[transition_index][spatial_node] < 0:
+                print(
+                    "Integration error: transition amounts negative (trans_idx, node)",
+                    transition_index,
+                    spatial_node,
+                )
+            if (
+                transition_amounts[transition_index][spatial_node]
+                >= st_next[0][transitions[transition_source_col][transition_index]][spatial_node] - float_tolerance
+            ):
+                transition_amounts[transition_index][spatial_node] = max(
+                    st_next[0][transitions[transition_source_col][transition_index]][spatial_node]
+                    - float_tolerance,
+                    0,
+                )
+        st_next[0][transitions[transition_source_col][transition_index]] -= transition_amounts[transition_index]
+        st_next[0][transitions[transition_destination_col][transition_index]] += transition_amounts[
+            transition_index
+        ]
+
+        states_diff[0, transitions[transition_source_col][transition_index]] -= transition_amounts[transition_index]
+        states_diff[0, transitions[transition_destination_col][transition_index]] += transition_amounts[
+            transition_index
+        ]
+        states_diff[1, transitions[transition_destination_col][transition_index], :] += transition_amounts[
+            transition_index
+        ]  # Cumumlative
+
+    return states + np.reshape(states_diff, states_diff.size)
+
+
+@jit(nopython=True, fastmath=True, cache=True)
+def rk4_integrate(
+    t,
+    x,
+    today,
+    ncompartments,
+    nspatial_nodes,
+    parameters,
+    dt,
+    transitions,
+    proportion_info,
+    transition_sum_compartments,
+    mobility_data,
+    mobility_row_indices,
+    mobility_data_indices,
+    population,
+    proportion_who_move,
+    percent_day_away,
+    stochastic_p,
+    method,
+):
+    rhs_args = (
+        ncompartments,
+        nspatial_nodes,
+        parameters,
+        dt,
+        transitions,
+        proportion_info,
+        transition_sum_compartments,
+        mobility_data,
+        mobility_row_indices,
+        mobility_data_indices,
+        population,
+        proportion_who_move,
+        percent_day_away,
+        stochastic_p,
+        method,
+    )
+    update_args = (ncompartments, nspatial_nodes, transitions, method)
+    k1 = rhs(t, x, today, *rhs_args)
+    k2 = rhs(t + dt / 2, update_states(x, dt / 2, k1, *update_args), today, *rhs_args)
+    k3 = rhs(t + dt / 2, update_states(x, dt / 2, k2, *update_args), today, *rhs_args)
+    k4 = rhs(t + dt, update_states(x, dt, k3, *update_args), today, *rhs_args)
+    return update_states(x, dt / 6, (k1 + 2 * k2 + 2 * k3 + k4), *update_args)
+
+
+def warm_up_jit(method="rk4"):
+    """
+    Compile the kernels used by `rk4_integration` with this `method`, or load them from numba's
+    on-disk cache, by running them on a minimal problem with the argument types used there.
+    """
+    x = np.zeros(2)
+    rhs_args = (
+        1,
+        1,
+        np.zeros((1, 1, 1)),
+        1.0,
+        np.zeros((5, 0), dtype=np.int64),
+        np.zeros((3, 0), dtype=np.int64),
+        np.zeros(0, dtype=np.int64),
+        np.zeros(0),
+        np.zeros(0, dtype=np.int32),
+        np.zeros(2, dtype=np.int32),
+        np.ones(1, dtype=np.int64),
+        np.zeros(1),
+        0.5,
+        False,
+        method,
+    )
+    if method == "rk4":
+        rk4_integrate(0.0, x, 0, *rhs_args)
+    elif method == "legacy":
+        # legacy calls the kernels from python, each needs its own compiled signature
+        update_states(x, 1.0, rhs(0.0, x, 0, *rhs_args), 1, 1, rhs_args[4], method)
+    else:
+        raise ValueError(f"Unknown integration method {method}.")
+
+
 def rk4_integration(
     *,
     ncompartments,  # 1
@@ -45,8 +298,6 @@ def rk4_integration(
     states_current = np.zeros((ncompartments, nspatial_nodes))
     states_next = np.zeros((ncompartments, nspatial_nodes))
 
-    ntransitions = transitions.shape[1]
-
     ## Setting values
     states_current = np.copy(initial_conditions)
     states_next = states_current.copy()
@@ -60,156 +311,23 @@ def rk4_integration(
             1,
         )
 
-    @jit(nopython=True)
-    def rhs(t, x, today):
-        states_current = np.reshape(x, (2, ncompartments, nspatial_nodes))[0]
-        st_next = states_current.copy()  # this is used to make sure stochastic integration never goes below zero
-        transition_amounts = np.zeros((ntransitions, nspatial_nodes))  # keep track of the transitions
-
-        if (x < 0).any():
-            print("Integration error: rhs got a negative x (pos, time)", np.where(x < 0), t)
-
-        for transition_index in range(ntransitions):
-            total_rate = np.ones((nspatial_nodes))
-            first_proportion = True
-
-            # Each transition may have several proportional_to factors
-            for proportion_index in range(
-                transitions[transition_proportion_start_col][transition_index],
-                transitions[transition_proportion_stop_col][transition_index],
-            ):
-                # Compute the number of individuals in the compartments for this proportions
-                relevant_number_in_comp = np.zeros((nspatial_nodes))
-                relevant_exponent = np.ones((nspatial_nodes))
-                for proportion_sum_index in range(
-                    proportion_info[proportion_sum_starts_col][proportion_index],
-                    proportion_info[proportion_sum_stops_col][proportion_index],
-                ):
-                    relevant_number_in_comp += states_current[transition_sum_compartments[proportion_sum_index]]
-
-                # exponents should not be a proportion, since we don't sum them over sum compartments
-                relevant_exponent = parameters[proportion_info[proportion_exponent_col][proportion_index]][today]
-
-                # chadi: i believe what this mean that the first proportion is always the
-                # source compartment. That's why there is nothing with n_spatial node here.
-                # but (TODO) we should enforce that ?
-                if first_proportion:
-                    only_one_proportion = (
-                        transitions[transition_proportion_start_col][transition_index] + 1
-                    ) == transitions[transition_proportion_stop_col][transition_index]
-                    first_proportion = False
-                    source_number = relevant_number_in_comp  # does this mean we need the first to be "source" ??? yes !
-                    if source_number.max() > 0:
-                        total_rate[source_number > 0] *= (
-                            source_number[source_number > 0] ** relevant_exponent[source_number > 0]
-                            / source_number[source_number > 0]
-                        )
-                    if only_one_proportion:
-                        total_rate *= parameters[transitions[transition_rate_col][transition_index]][today]
-                else:
-                    for spatial_node in range(nspatial_nodes):
-                        proportion_keep_compartment = 1 - percent_day_away * proportion_who_move[spatial_node]
-                        proportion_change_compartment = (
-                            percent_day_away
-                            * mobility_data[
-                                mobility_data_indices[spatial_node] : mobility_data_indices[spatial_node + 1]
-                            ]
-                            / population[spatial_node]
-                        )
-                        rate_keep_compartment = (
-                            proportion_keep_compartment
-                            * relevant_number_in_comp[spatial_node] ** relevant_exponent[spatial_node]
-                            / population[spatial_node]
-                            * parameters[transitions[transition_rate_col][transition_index]][today][spatial_node]
-                        )
-
-                        visiting_subpop = mobility_row_indices[
-                            mobility_data_indices[spatial_node] : mobility_data_indices[spatial_node + 1]
-                        ]
-
-                        rate_change_compartment = proportion_change_compartment * (
-                            relevant_number_in_comp[visiting_subpop] ** relevant_exponent[visiting_subpop]
-                        )
-                        rate_change_compartment /= population[visiting_subpop]
-                        rate_change_compartment *= parameters[transitions[transition_rate_col][transition_index]][
-                            today
-                        ][visiting_subpop]
-                        total_rate[spatial_node] *= (rate_keep_compartment + rate_change_compartment.sum())
-
-            # compute the number of individual transitioning from source to destination from the total rate
-            # number_move has shape (nspatial_nodes)
-            if method == "rk4":
-                number_move = source_number * total_rate
-            elif method == "legacy":
-                compound_adjusted_rate = 1.0 - np.exp(-dt * total_rate)
-                if stochastic_p:
-                    number_move = source_number * compound_adjusted_rate  ## to initialize typ
-                    for spatial_node in range(nspatial_nodes):
-                        number_move[spatial_node] = np.random.binomial(
-                            # number_move[spatial_node] = random.binomial(
-                            source_number[spatial_node],
-                            compound_adjusted_rate[spatial_node],
-                        )
-                else:
-                    number_move = source_number * compound_adjusted_rate
-
-            transition_amounts[transition_index] = number_move
-
-        return transition_amounts
-        # for spatial_node in range(nspatial_nodes):
-        #    if number_move[spatial_node] > states_current[transitions[transition_source_col][transition_index]][spatial_node]:
-        #        number_move[spatial_node] = states_current[transitions[transition_source_col][transition_index]][spatial_node]
-
-    @jit(nopython=True)
-    def update_states(states, delta_t, transition_amounts):
-        states_diff = np.zeros((2, ncompartments, nspatial_nodes))  # first dim: 0 -> states_diff, 1: states_cum
-        st_next = states.copy()
-        st_next = np.reshape(st_next, (2, ncompartments, nspatial_nodes))
-        if method == "rk4":
-            # we move by delta_t * transitions, in case of rk4
-            # when we use legacy, the compound_adjusted_rate  already
-            # includes the time step
-            transition_amounts = transition_amounts.copy() * delta_t
-
-        for transition_index in range(ntransitions):
-            for spatial_node in range(nspatial_nodes):
-                if transition_amounts[transition_index][spatial_node] < 0:
-                    print(
-                        "Integration error: transition amounts negative (trans_idx, node)",
-                        transition_index,
-                        spatial_node,
-                    )
-                if (
-                    transition_amounts[transition_index][spatial_node]
-                    >= st_next[0][transitions[transition_source_col][transition_index]][spatial_node] - float_tolerance
-                ):
-                    transition_amounts[transition_index][spatial_node] = max(
-                        st_next[0][transitions[transition_source_col][transition_index]][spatial_node]
-                        - float_tolerance,
-                        0,
-                    )
-            st_next[0][transitions[transition_source_col][transition_index]] -= transition_amounts[transition_index]
-            st_next[0][transitions[transition_destination_col][transition_index]] += transition_amounts[
-                transition_index
-            ]
-
-            states_diff[0, transitions[transition_source_col][transition_index]] -= transition_amounts[transition_index]
-            states_diff[0, transitions[transition_destination_col][transition_index]] += transition_amounts[
-                transition_index
-            ]
-            states_diff[1, transitions[transition_destination_col][transition_index], :] += transition_amounts[
-                transition_index
-            ]  # Cumumlative
-
-        return states + np.reshape(states_diff, states_diff.size)
-
-    @jit(nopython=True, fastmath=True)
-    def rk4_integrate(t, x, today):
-        k1 = rhs(t, x, today)
-        k2 = rhs(t + dt / 2, update_states(x, dt / 2, k1), today)
-        k3 = rhs(t + dt / 2, update_states(x, dt / 2, k2), today)
-        k4 = rhs(t + dt, update_states(x, dt, k3), today)
-        return update_states(x, dt / 6, (k1 + 2 * k2 + 2 * k3 + k4))
+    rhs_args = (
+        ncompartments,
+        nspatial_nodes,
+        parameters,
+        dt,
+        transitions,
+        proportion_info,
+        transition_sum_compartments,
+        mobility_data,
+        mobility_row_indices,
+        mobility_data_indices,
+        population,
+        proportion_who_move,
+        percent_day_away,
+        stochastic_p,
+        method,
+    )
 
     yesterday = -1
     times = np.arange(0, (ndays - 1) + 1e-7, dt)
@@ -244,9 +362,11 @@ def rk4_integration(
         x_[0] = states_next
         x_ = np.reshape(x_, x_.size)
         if method == "rk4":
-            sol = rk4_integrate(time, x_, today)
+            sol = rk4_integrate(time, x_, today, *rhs_args)
         elif method == "legacy":
-            sol = update_states(x_, dt, rhs(time, x_, today))
+            sol = update_states(
+                x_, dt, rhs(time, x_, today, *rhs_args), ncompartments, nspatial_nodes, transitions, method
+            )
         x_ = np.reshape(sol, (2, ncompartments, nspatial_nodes))
         states_daily_incid[today] += x_[1]
         states_next = x_[0]
@@ -3,7 +3,7 @@ import numpy as np
 import pandas as pd
 import scipy.sparse
 from .utils import read_df, write_df
-import logging, pathlib
+import logging
 
 
 logger = logging.getLogger(__name__)
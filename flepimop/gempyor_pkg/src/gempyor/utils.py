@@ -14,6 +14,7 @@ import numpy as np
 import numpy.typing as npt
 import pandas as pd
 import pyarrow as pa
+import pyarrow.parquet as pq
 import scipy.ndimage
 import scipy.stats
 import sympy.parsing.sympy_parser
@@ -93,7 +94,9 @@ def read_df(
             path, converters={"subpop": lambda x: str(x)}, skipinitialspace=True
         )
     elif path.suffix == ".parquet":
-        return pd.read_parquet(path, engine="pyarrow")
+        # Keep the default block consolidation: outputs such as seir have one column per
+        # subpop, and a block per column makes row filters and column inserts slow
+        return pq.read_table(path).to_pandas(use_threads=True)
     raise NotImplementedError(
         f"Invalid extension {path.suffix[1:]}. Must be 'csv' or 'parquet'."
     )
@@ -29,6 +29,8 @@ class TestCreateFileName:
             ("abc", "def", "ghi", "jkl", "csv", "mno", "pqr", True),
             ("abc", "def", 123, "jkl", "parquet", "mno", "pqr", False),
             ("abc", "def", 123, "jkl", "parquet", "mno", "pqr", True),
+            ("abc", Path("def/ghi"), 123, "jkl", "parquet", "mno", "pqr", False),
+            ("abc", Path("def/ghi"), 123, "jkl", "parquet", "mno", "pqr", True),
             ("20240101_000000", "test0001", "0", "seed", "csv", "", "", True),
             ("20240101_000000", "test0002", "0", "seed", "parquet", "", "", True),
             ("20240101_000000", "test0003", "0", "seed", "csv", "", "", False),
@@ -42,7 +44,7 @@ class TestCreateFileName:
     def test_create_file_name(
         self,
         run_id: str,
-        prefix: str,
+        prefix: str | os.PathLike,
         index: str | int,
         ftype: str,
         extension: str,
@@ -0,0 +1,40 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from gempyor.NPI import helpers
+
+
+def test_build_reduction_later_periods_override():
+    reduction = helpers.build_reduction(
+        1.0,
+        ["a", "b", "c"],
+        datetime.date(2020, 1, 1),
+        datetime.date(2020, 1, 10),
+        period_subpops=["a", "b", "a"],
+        period_starts=[datetime.date(2020, 1, 1), datetime.date(2020, 1, 5), datetime.date(2020, 1, 3)],
+        period_ends=[datetime.date(2020, 1, 4), datetime.date(2020, 1, 10), datetime.date(2020, 1, 3)],
+        values=[0.5, np.array([0.2]), 0.1],
+    )
+
+    expected = pd.DataFrame(1.0, index=["a", "b", "c"], columns=pd.date_range("2020-01-01", "2020-01-10"))
+    expected.loc["a", "2020-01-01":"2020-01-04"] = 0.5
+    expected.loc["a", "2020-01-03"] = 0.1
+    expected.loc["b", "2020-01-05":"2020-01-10"] = 0.2
+    pd.testing.assert_frame_equal(reduction, expected)
+
+
+def test_build_reduction_out_of_range_fail():
+    with pytest.raises(ValueError, match=r".*not between global dates.*"):
+        helpers.build_reduction(
+            0.0,
+            ["a"],
+            datetime.date(2020, 1, 1),
+            datetime.date(2020, 1, 10),
+            period_subpops=["a"],
+            period_starts=[datetime.date(2020, 1, 5)],
+            period_ends=[datetime.date(2020, 1, 11)],
+            values=[0.3],
+        )
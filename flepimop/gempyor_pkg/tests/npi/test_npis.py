@@ -1,30 +1,25 @@
 import gempyor
 import numpy as np
-import pandas as pd
-import datetime
 import pytest
 
 from gempyor.utils import config
 
-import pandas as pd
-import numpy as np
-import datetime
-import matplotlib.pyplot as plt
-import glob, os, sys, shutil
 from pathlib import Path
 
-# import seaborn as sns
 import pyarrow.parquet as pq
 import pyarrow as pa
 from gempyor import file_paths, outcomes, seir
 
 config_filepath_prefix = ""
 
-os.chdir(os.path.dirname(__file__))
+
+@pytest.fixture(autouse=True)
+def _cd_to_test_dir(monkeypatch):
+    monkeypatch.chdir(Path(__file__).parent)
 
 
 def test_full_npis_read_write():
-    os.chdir(os.path.dirname(__file__))
+    rng = np.random.default_rng(10)
 
     inference_simulator = gempyor.GempyorInference(
         config_filepath=f"{config_filepath_prefix}config_npi.yml",
@@ -50,12 +45,9 @@ def test_full_npis_read_write():
     inference_simulator.modinf.write_simID(ftype="hnpi", sim_id=1, df=npi_outcomes.getReductionDF())
 
     hnpi_read = pq.read_table(f"{config_filepath_prefix}model_output/hnpi/000000001.105.hnpi.parquet").to_pandas()
-    hnpi_read["value"] = np.random.random(len(hnpi_read)) * 2 - 1
+    hnpi_read["value"] = rng.uniform(-1.0, 1.0, size=len(hnpi_read))
     out_hnpi = pa.Table.from_pandas(hnpi_read, preserve_index=False)
     pa.parquet.write_table(out_hnpi, file_paths.create_file_name(105, "", 1, "hnpi", "parquet"))
-    import random
-
-    random.seed(10)
 
     inference_simulator = gempyor.GempyorInference(
         config_filepath=f"{config_filepath_prefix}config_npi.yml",
@@ -78,7 +70,8 @@ def test_full_npis_read_write():
 
     hnpi_read = pq.read_table(f"{config_filepath_prefix}model_output/hnpi/000000001.105.hnpi.parquet").to_pandas()
     hnpi_wrote = pq.read_table(f"{config_filepath_prefix}model_output/hnpi/000000001.106.hnpi.parquet").to_pandas()
-    assert (hnpi_read == hnpi_wrote).all().all()
+    assert hnpi_read.columns.equals(hnpi_wrote.columns)
+    assert np.array_equal(hnpi_read.values, hnpi_wrote.values)
 
     # runs with the new, random NPI
     inference_simulator = gempyor.GempyorInference(
@@ -102,7 +95,8 @@ def test_full_npis_read_write():
 
     hnpi_read = pq.read_table(f"{config_filepath_prefix}model_output/hnpi/000000001.106.hnpi.parquet").to_pandas()
     hnpi_wrote = pq.read_table(f"{config_filepath_prefix}model_output/hnpi/000000001.107.hnpi.parquet").to_pandas()
-    assert (hnpi_read == hnpi_wrote).all().all()
+    assert hnpi_read.columns.equals(hnpi_wrote.columns)
+    assert np.array_equal(hnpi_read.values, hnpi_wrote.values)
 
 
 def test_spatial_groups():
@@ -1,13 +1,17 @@
 import datetime
 import numpy as np
 import os
+import pathlib
 import pandas as pd
 import pytest
 import confuse
+import pyarrow.parquet as pq
+import scipy.sparse
 
-from gempyor.model_info import ModelInfo, subpopulation_structure
+from gempyor.model_info import ModelInfo, get_integration_settings, subpopulation_structure
+from gempyor.testing import create_confuse_configview_from_dict
 
-from gempyor.utils import config
+from gempyor.utils import config, write_df
 
 TEST_SETUP_NAME = "minimal_test"
 
@@ -108,3 +112,119 @@ class TestModelInfo:
             inference_filepath_suffix="",
             setup_name=TEST_SETUP_NAME,
         )
+
+    def test_get_filenames_matches_get_filename(self):
+        config.clear()
+        config.read(user=False)
+        config.set_file(f"{DATA_DIR}/config_test.yml")
+        s = ModelInfo(config=config, in_run_id="test_in", out_run_id="test_out", first_sim_index=3)
+        for input in (True, False):
+            assert s.get_filenames(ftype="hnpi", sim_ids=range(1, 5), input=input, extension_override="parquet") == [
+                s.get_filename(ftype="hnpi", sim_id=sim_id, input=input, extension_override="parquet")
+                for sim_id in range(1, 5)
+            ]
+        assert str(s.get_filenames(ftype="spar", sim_ids=[1], extension_override="csv")[0]).endswith(
+            "000000003.test_out.spar.csv"
+        )
+
+    def test_mobility_csr_arrays(self):
+        config.clear()
+        config.read(user=False)
+        config.set_file(f"{DATA_DIR}/config_test.yml")
+        s = ModelInfo(config=config)
+        assert isinstance(s.mobility, scipy.sparse.csr_matrix)
+        assert s.mobility_data.dtype == np.float64
+        assert np.array_equal(s.mobility_data, s.mobility.data)
+        assert s.mobility_indices is s.mobility.indices
+        assert s.mobility_indptr is s.mobility.indptr
+        assert len(s.mobility_indptr) == s.nsubpops + 1
+
+    def test_write_simID_parquet(self, tmp_path, monkeypatch):
+        config.clear()
+        config.read(user=False)
+        config.set_file(f"{DATA_DIR}/config_test.yml")
+        s = ModelInfo(config=config, in_run_id="test", out_run_id="test")
+        monkeypatch.chdir(tmp_path)
+        df = pd.DataFrame({"subpop": ["10001", "20002"], "modifier_name": ["r0", "r0"], "value": [0.1, -0.2]})
+        for sim_id in (1, 2):
+            df["value"] = df["value"] * sim_id
+            fname = s.write_simID(ftype="hnpi", sim_id=sim_id, df=df, extension_override="parquet")
+            pd.testing.assert_frame_equal(
+                s.read_simID(ftype="hnpi", sim_id=sim_id, input=False, extension_override="parquet"), df
+            )
+            # same codec as the outputs written through write_df
+            write_df(tmp_path / "write_df.parquet", df)
+            assert (
+                pq.ParquetFile(fname).metadata.row_group(0).column(0).compression
+                == pq.ParquetFile(tmp_path / "write_df.parquet").metadata.row_group(0).column(0).compression
+            )
+        assert len(s._parquet_schemas) == 1
+
+        # a change of dtype gets its own schema
+        df["value"] = [1, 2]
+        s.write_simID(ftype="hnpi", sim_id=3, df=df, extension_override="parquet")
+        pd.testing.assert_frame_equal(
+            s.read_simID(ftype="hnpi", sim_id=3, input=False, extension_override="parquet"), df
+        )
+        assert len(s._parquet_schemas) == 2
+
+    def test_seir_objects_shared_across_identical_configs(self):
+        config.clear()
+        config.read(user=False)
+        config.set_file(f"{DATA_DIR}/config_test.yml")
+        s1 = ModelInfo(config=config)
+        s2 = ModelInfo(config=config)
+        assert s1.compartments is s2.compartments
+
+        config["end_date"] = "2020-05-01"
+        s3 = ModelInfo(config=config)
+        assert s3.compartments is s1.compartments
+
+    def test_parameters_reread_timeseries(self, tmp_path, monkeypatch):
+        (tmp_path / "data").mkdir()
+        for f in ["config_compartmental_model_format_with_covariates.yml", "geodata.csv", "mobility.txt", "r0s_ts.csv"]:
+            (tmp_path / "data" / f).write_bytes(pathlib.Path(DATA_DIR, f).read_bytes())
+        monkeypatch.chdir(tmp_path)
+
+        config.clear()
+        config.read(user=False)
+        config.set_file("data/config_compartmental_model_format_with_covariates.yml")
+        s1 = ModelInfo(config=config)
+
+        ts = pd.read_csv("data/r0s_ts.csv")
+        ts.iloc[:, 1:] *= 10
+        ts.to_csv("data/r0s_ts.csv", index=False)
+        s2 = ModelInfo(config=config)
+
+        assert s2.parameters is not s1.parameters
+        np.testing.assert_allclose(s2.parameters.pdata["R0s"]["ts"], 10 * s1.parameters.pdata["R0s"]["ts"])
+
+
+@pytest.mark.parametrize(
+    ("seir_dict", "expected"),
+    (
+        ({"parameters": {}}, ("rk4.jit", 2.0)),
+        ({"integration": {"method": "legacy", "dt": "1/6"}}, ("legacy", 1 / 6)),
+        ({"integration": {"method": "rk4", "dt": 1}}, ("rk4.jit", 1.0)),
+        ({"integration": {"method": "best.current"}}, ("rk4.jit", 2.0)),
+        ({"integration": {"method": "legacy", "dt": "2**-1 + -(1/4)"}}, ("legacy", 0.25)),
+    ),
+)
+def test_get_integration_settings(seir_dict, expected):
+    seir_config = create_confuse_configview_from_dict(seir_dict, name="seir")
+    method, dt = get_integration_settings(seir_config)
+    assert (method, dt) == expected
+    assert type(dt) == float  # the compiled integrators require a float dt
+
+
+def test_get_integration_settings_unknown_method_fail():
+    seir_config = create_confuse_configview_from_dict({"integration": {"method": "euler"}}, name="seir")
+    with pytest.raises(ValueError, match=r"^Unknown integration method euler.$"):
+        get_integration_settings(seir_config)
+
+
+@pytest.mark.parametrize("dt", ("__import__('os').getcwd()", "1/", "1/0", "'1'", "True"))
+def test_get_integration_settings_invalid_dt_fail(dt):
+    seir_config = create_confuse_configview_from_dict({"integration": {"method": "legacy", "dt": dt}}, name="seir")
+    with pytest.raises(ValueError, match=r"^Could not parse the integration dt .*"):
+        get_integration_settings(seir_config)
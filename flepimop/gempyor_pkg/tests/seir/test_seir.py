@@ -8,7 +8,7 @@ import pathlib
 import pyarrow as pa
 import pyarrow.parquet as pq
 
-from gempyor import model_info, seir, NPI, file_paths, subpopulation_structure
+from gempyor import model_info, seir, NPI, file_paths, steps_rk4, subpopulation_structure
 
 from gempyor.utils import config
 
@@ -824,3 +824,59 @@ def test_parallel_compartments_no_vacc():
             ].max()["10001"]
             == 0
         )
+
+
+@pytest.mark.parametrize(
+    ("config_file", "kernels"),
+    [
+        ("config.yml", ("rhs", "update_states")),
+        ("config_seir_integration_method_rk4_2.yml", ("rk4_integrate",)),
+    ],
+)
+def test_warm_up_jit_matches_simulation_signatures(config_file, kernels):
+    # the warm-up is only useful if it compiles the signatures a simulation then uses
+    config.set_file(f"{DATA_DIR}/{config_file}")
+    modinf = model_info.ModelInfo(
+        config=config,
+        nslots=1,
+        seir_modifiers_scenario="None",
+        write_csv=False,
+        first_sim_index=1,
+        in_run_id="test",
+        in_prefix="",
+        out_run_id="test",
+        out_prefix="",
+    )
+
+    seeding_data, seeding_amounts = modinf.seeding.get_from_file(sim_id=100, modinf=modinf)
+    initial_conditions = modinf.initial_conditions.get_from_config(sim_id=100, modinf=modinf)
+    npi = NPI.NPIBase.execute(
+        npi_config=modinf.npi_config_seir,
+        modinf=modinf,
+        modifiers_library=modinf.seir_modifiers_library,
+        subpops=modinf.subpop_struct.subpop_names,
+        pnames_overlap_operation_sum=modinf.parameters.stacked_modifier_method["sum"],
+        pnames_overlap_operation_reductionprod=modinf.parameters.stacked_modifier_method["reduction_product"],
+    )
+    params = modinf.parameters.parameters_quick_draw(modinf.n_days, modinf.nsubpops)
+    params = modinf.parameters.parameters_reduce(params, npi)
+    (
+        unique_strings,
+        transition_array,
+        proportion_array,
+        proportion_info,
+    ) = modinf.compartments.get_transition_array()
+    parsed_parameters = modinf.compartments.parse_parameters(params, modinf.parameters.pnames, unique_strings)
+    seir.steps_SEIR(
+        modinf,
+        parsed_parameters,
+        transition_array,
+        proportion_array,
+        proportion_info,
+        initial_conditions,
+        seeding_data,
+        seeding_amounts,
+    )
+
+    for kernel in kernels:
+        assert len(getattr(steps_rk4, kernel).signatures) == 1
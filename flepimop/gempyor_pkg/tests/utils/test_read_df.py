@@ -1,13 +1,15 @@
 import os
+import warnings
 from tempfile import NamedTemporaryFile
 from pathlib import Path
 from typing import Callable, Any, Literal
 
 import pytest
+import numpy as np
 import pandas as pd
 from pandas.api.types import is_object_dtype, is_numeric_dtype
 
-from gempyor.utils import read_df
+from gempyor.utils import read_df, write_df
 
 
 class TestReadDf:
@@ -146,6 +148,26 @@ class TestReadDf:
             assert is_numeric_dtype(test_df["subpop"])
             assert is_numeric_dtype(test_df["value"])
 
+    def test_read_wide_parquet_dataframe(self) -> None:
+        """
+        Tests that a wide DataFrame, shaped like seir outputs with one column per
+        subpop, round trips through parquet and comes back consolidated.
+        """
+        wide_df = pd.DataFrame(
+            np.random.default_rng(0).random((10, 200)),
+            columns=[f"{i:05d}" for i in range(200)],
+        )
+        wide_df.insert(0, "date", pd.date_range("2020-01-01", periods=10))
+        with NamedTemporaryFile(suffix=".parquet") as temp_file:
+            temp_path = Path(temp_file.name)
+            write_df(fname=temp_path, df=wide_df)
+            test_df = read_df(fname=temp_path)
+        pd.testing.assert_frame_equal(test_df, wide_df)
+        # A fragmented frame (one block per column) warns on column inserts
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", pd.errors.PerformanceWarning)
+            test_df["new"] = 1.0
+
     def _test_read_df(
         self,
         fname_transformer: Callable[[os.PathLike], Any],